@@ -4,6 +4,7 @@ import socket
 import json
 import time
 import asyncio
+import inspect
 import signal
 import sys
 import os
@@ -12,7 +13,8 @@ import os
 sys.path.append('/home/dpsh/roh_demos/glove_ctrled_rohand')
 
 from pykos import KOS
-from pos_input_usb_glove import PosInputUsbGlove as PosInput
+from tx_timestamping import TxTimestampMonitor
+from leader_recording import LeaderRecorder
 
 # UDP Configuration
 UDP_HOST = "10.33.10.154"  # Target IP - change as needed
@@ -24,31 +26,218 @@ KOS_TIMEOUT = 0.5  # Timeout for KOS operations
 GLOVE_TIMEOUT = 0.5  # Timeout for glove operations
 UDP_TIMEOUT = 0.1  # Timeout for UDP operations
 
+# Report kernel send->transmit delay and socket queue depth (Linux only)
+TX_TIMESTAMPING = False
+
 # Number of fingers from glove
 NUM_FINGERS = 6
 
+# Glove configuration - one entry per hand, each read by its own task.
+# "type" is "usb" or "ble". "serial" selects the device: the USB serial number
+# (see `python3 -m serial.tools.list_ports -v`) or the BLE name/address.
+# None uses whichever glove the OyMotion driver finds first, so at most one
+# glove per type may leave it unset.
+GLOVES = {
+    "left": {"type": "usb", "serial": None},
+    # Second hand, e.g.:
+    # "right": {"type": "ble", "serial": None},
+}
+GLOVE_READ_RATE = 100.0  # Hz - upper bound on how often each glove is polled
+GLOVE_STALE_AFTER = 0.5  # Seconds without new glove data before it is reported stale
+GLOVE_WARNING_INTERVAL = 5.0  # Seconds between repeated warnings for a failing glove
+
 # Finger value processing
 FINGER_MAX_VALUE = 65535  # Maximum finger sensor value
 
+# Constructor parameters that can name the device, checked in order. The OyMotion
+# demos only ever construct the gloves without arguments, so a device is passed
+# only if the installed driver declares one of these.
+USB_GLOVE_DEVICE_PARAMS = ("port", "port_name", "com_port", "serial_port", "device")
+BLE_GLOVE_DEVICE_PARAMS = ("address", "device_address", "mac", "name", "device_name")
+
+
+def _create_for_device(glove_class, param_names, device):
+    """Construct a glove input for one device, via a parameter its constructor declares"""
+    params = inspect.signature(glove_class).parameters
+    for name in param_names:
+        if name in params:
+            return glove_class(**{name: device})
+    raise RuntimeError(f"{glove_class.__name__}() cannot select a device (no {'/'.join(param_names)} "
+                       f"parameter) - only one glove of this type is supported, set \"serial\": None")
+
+
+def create_glove_input(kind, serial=None):
+    """Create an OyMotion glove input for a USB or BLE glove
+
+    Without a serial this is the no-argument constructor used by
+    glove_ctrled_hand_modified.py, which opens the first glove found. With a
+    serial, the USB serial number is resolved to its port (or the BLE name /
+    address used as is) and passed by keyword, which fails with an explanation
+    if the installed driver has no such parameter.
+    """
+    if kind == "usb":
+        from pos_input_usb_glove import PosInputUsbGlove
+        if serial is None:
+            return PosInputUsbGlove()
+        # Resolve the USB serial number to its serial port
+        from serial.tools import list_ports
+        for port in list_ports.comports():
+            if port.serial_number == serial:
+                return _create_for_device(PosInputUsbGlove, USB_GLOVE_DEVICE_PARAMS, port.device)
+        raise RuntimeError(f"No USB glove with serial {serial}")
+    elif kind == "ble":
+        from pos_input_ble_glove import PosInputBleGlove
+        if serial is None:
+            return PosInputBleGlove()
+        return _create_for_device(PosInputBleGlove, BLE_GLOVE_DEVICE_PARAMS, serial)
+    raise ValueError(f"Unknown glove type: {kind}")
+
+
+class GloveReader:
+    """Reads one glove in its own task and keeps the latest finger positions"""
+
+    def __init__(self, side, kind, serial=None, glove_factory=create_glove_input):
+        self.side = side
+        self.kind = kind
+        self.serial = serial
+        self.glove_factory = glove_factory
+        self.period = 1.0 / GLOVE_READ_RATE
+
+        self.pos_input = None
+        self.task = None
+        self.running = False
+
+        # Last known finger data and when it was read (time.monotonic)
+        self.finger_data = [0 for _ in range(NUM_FINGERS)]
+        self.last_update = None
+        
+        # Consecutive failed reads, warned about when they start and then every GLOVE_WARNING_INTERVAL
+        self.failed_reads = 0
+        self.last_warning = 0.0
+
+    @property
+    def name(self):
+        return f"{self.side} {self.kind.upper()} glove" + (f" ({self.serial})" if self.serial else "")
+
+    async def start(self):
+        """Connect to the glove and start the read task"""
+        try:
+            self.pos_input = self.glove_factory(self.kind, self.serial)
+            if not await self.pos_input.start():
+                print(f"❌ Failed to initialize {self.name}")
+                return False
+        except Exception as e:
+            print(f"❌ Failed to setup {self.name}: {e}")
+            return False
+
+        self.running = True
+        self.task = asyncio.create_task(self._read_loop())
+        print(f"✅ Connected to {self.name}")
+        return True
+
+    async def _read_loop(self):
+        """Continuously read finger positions, independent of the send loop"""
+        while self.running:
+            start_time = time.monotonic()
+            try:
+                raw_finger_data = await asyncio.wait_for(
+                    self.pos_input.get_position(),
+                    timeout=GLOVE_TIMEOUT
+                )
+
+                # Flip finger values: max_value - current_value
+                # This inverts the finger positions (FINGER_MAX_VALUE - value)
+                self.finger_data = [FINGER_MAX_VALUE - value for value in raw_finger_data]
+                self.last_update = time.monotonic()
+
+                if self.failed_reads:
+                    print(f"✅ {self.name} recovered after {self.failed_reads} failed reads")
+                    self.failed_reads = 0
+
+            except asyncio.TimeoutError:
+                self._warn_failed_read(f"{self.name} timeout after {GLOVE_TIMEOUT}s")
+            except Exception as e:
+                self._warn_failed_read(f"Error reading {self.name}: {e}")
+
+            # Don't poll faster than GLOVE_READ_RATE (also yields to the send loop)
+            await asyncio.sleep(max(0.0, self.period - (time.monotonic() - start_time)))
+
+    def _warn_failed_read(self, message):
+        """Warn on the first failed read, then at most every GLOVE_WARNING_INTERVAL"""
+        self.failed_reads += 1
+        now = time.monotonic()
+        if self.failed_reads == 1 or now - self.last_warning >= GLOVE_WARNING_INTERVAL:
+            suffix = f" ({self.failed_reads} failed reads)" if self.failed_reads > 1 else ""
+            print(f"⚠️ {message}{suffix}")
+            self.last_warning = now
+
+    def age(self):
+        """Seconds since the last successful read, or None if never read"""
+        if self.last_update is None:
+            return None
+        return time.monotonic() - self.last_update
+
+    def is_fresh(self):
+        age = self.age()
+        return age is not None and age <= GLOVE_STALE_AFTER
+
+    async def stop(self):
+        """Stop the read task and close the glove"""
+        # wait_for() can swallow a cancel that races with a completed read,
+        # so the loop also checks this flag
+        self.running = False
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+        if self.pos_input:
+            try:
+                await self.pos_input.stop()
+            except:
+                pass
+            self.pos_input = None
+
+
 class CombinedGloveUDPSender:
-    def __init__(self, udp_host=UDP_HOST, udp_port=UDP_PORT, send_rate=SEND_RATE):
+    def __init__(self, udp_host=UDP_HOST, udp_port=UDP_PORT, send_rate=SEND_RATE,
+                 gloves=GLOVES, kos_factory=KOS, glove_factory=create_glove_input,
+                 tx_timestamping=TX_TIMESTAMPING, record_path=None):
         self.udp_host = udp_host
         self.udp_port = udp_port
         self.send_rate = send_rate
         self.period = 1.0 / send_rate
+        self.kos_factory = kos_factory
+        self.tx_timestamping = tx_timestamping
+        self.record_path = record_path
         
         # Initialize components
         self.kos = None
-        self.pos_input = None
         self.sock = None
+        self.tx_monitor = None
+        self.recorder = None
         self.terminated = False
+        self.verbose = True  # Print a line for every packet sent
+        
+        # Two gloves of the same type without a serial would both open the first device found
+        unselected = [config["type"] for config in gloves.values() if config.get("serial") is None]
+        for kind in set(unselected):
+            if unselected.count(kind) > 1:
+                raise ValueError(f"Multiple {kind.upper()} gloves configured without a serial - "
+                                 f"set \"serial\" to tell them apart")
+        
+        # One independent reader per glove
+        self.gloves = {
+            side: GloveReader(side, config["type"], config.get("serial"), glove_factory)
+            for side, config in gloves.items()
+        }
         
         # Setup signal handler
         signal.signal(signal.SIGINT, lambda signal, frame: self._signal_handler())
         
-        # Last known finger data
-        self.finger_data = [0 for _ in range(NUM_FINGERS)]
-        
         # Health monitoring
         self.consecutive_failures = 0
         self.max_consecutive_failures = 10  # Reconnect after 10 failures
@@ -65,7 +254,7 @@ class CombinedGloveUDPSender:
     async def setup_kos(self):
         """Setup KOS connection"""
         try:
-            self.kos = KOS("127.0.0.1")
+            self.kos = self.kos_factory("127.0.0.1")
             print("✅ Connected to KOS service")
             return True
         except Exception as e:
@@ -73,17 +262,13 @@ class CombinedGloveUDPSender:
             return False
 
     async def setup_glove(self):
-        """Setup glove connection"""
-        try:
-            self.pos_input = PosInput()
-            if not await self.pos_input.start():
-                print("❌ Failed to initialize glove")
-                return False
-            print("✅ Connected to USB glove")
-            return True
-        except Exception as e:
-            print(f"❌ Failed to setup glove: {e}")
-            return False
+        """Setup glove connections, succeeds if at least one glove is connected"""
+        results = await asyncio.gather(*(glove.start() for glove in self.gloves.values()))
+        return any(results)
+
+    async def stop_gloves(self):
+        """Stop all glove readers"""
+        await asyncio.gather(*(glove.stop() for glove in self.gloves.values()))
 
     def setup_udp(self):
         """Setup UDP socket"""
@@ -108,11 +293,31 @@ class CombinedGloveUDPSender:
             
             print(f"✅ UDP socket ready - sending to {self.udp_host}:{self.udp_port}")
             print(f"   Buffer size: 64KB, Non-blocking mode enabled")
+            
+            # Kernel TX timestamps, read from the error queue in the background
+            if self.tx_timestamping:
+                monitor = TxTimestampMonitor(self.sock)
+                if monitor.enable():
+                    monitor.start()
+                    self.tx_monitor = monitor
+                    print("   TX timestamping enabled")
             return True
         except Exception as e:
             print(f"❌ Failed to setup UDP: {e}")
             return False
 
+    def setup_recording(self):
+        """Open the indexed recording file"""
+        try:
+            self.recorder = LeaderRecorder(self.record_path)
+            print(f"✅ Recording to {self.record_path}")
+            if self.recorder.recovered_frames:
+                print(f"   Indexed {self.recorder.recovered_frames} frames left unindexed by the last session")
+            return True
+        except Exception as e:
+            print(f"❌ Failed to open recording: {e}")
+            return False
+
     async def get_motor_positions(self):
         """Get current motor positions from KOS"""
         motor_positions = {}
@@ -138,76 +343,67 @@ class CombinedGloveUDPSender:
             
         return motor_positions
 
-    async def get_finger_positions(self):
-        """Get current finger positions from glove"""
-        try:
-            raw_finger_data = await asyncio.wait_for(
-                self.pos_input.get_position(), 
-                timeout=GLOVE_TIMEOUT
-            )
-            
-            # Flip finger values: max_value - current_value
-            # This inverts the finger positions (FINGER_MAX_VALUE - value)
-            flipped_finger_data = []
-            for value in raw_finger_data:
-                flipped_value = FINGER_MAX_VALUE - value
-                flipped_finger_data.append(flipped_value)
-            
-            self.finger_data = flipped_finger_data
-            
-        except asyncio.TimeoutError:
-            print(f"⚠️ Glove timeout after {GLOVE_TIMEOUT}s")
-        except Exception as e:
-            print(f"⚠️ Error getting finger positions: {e}")
-            
-        return self.finger_data
-
     async def send_combined_data(self):
         """Get both motor and finger data, then send via UDP"""
         try:
-            # Get motor positions and finger data concurrently with overall timeout
-            motor_positions, finger_data = await asyncio.wait_for(
-                asyncio.gather(
-                    self.get_motor_positions(),
-                    self.get_finger_positions(),
-                    return_exceptions=True
-                ),
-                timeout=max(KOS_TIMEOUT, GLOVE_TIMEOUT) + 0.1  # Extra buffer
+            # Get motor positions with overall timeout. Finger data is read by
+            # the glove tasks, so only the latest values are picked up here.
+            motor_positions = await asyncio.wait_for(
+                self.get_motor_positions(),
+                timeout=KOS_TIMEOUT + 0.1  # Extra buffer
             )
             
-            # Handle any exceptions from the gather
-            if isinstance(motor_positions, Exception):
-                motor_positions = {}
-            if isinstance(finger_data, Exception):
-                finger_data = self.finger_data  # Use last known values
-            
             # Build combined data packet
             combined_data = {
                 "timestamp": time.time(),
                 "joints": motor_positions,
-                "fingers": finger_data
             }
+            fingers_age = {}
+            for side, glove in self.gloves.items():
+                combined_data[f"fingers_{side}"] = glove.finger_data
+                age = glove.age()
+                fingers_age[side] = round(age, 3) if age is not None else None
+            combined_data["fingers_age"] = fingers_age
+            
+            # Keep "fingers" for receivers that only know about a single glove
+            if self.gloves:
+                combined_data["fingers"] = next(iter(self.gloves.values())).finger_data
             
             # Send via UDP (non-blocking)
-            json_data = json.dumps(combined_data)
+            payload = json.dumps(combined_data).encode('utf-8')
+            send_time = time.time()
             try:
-                self.sock.sendto(json_data.encode('utf-8'), (self.udp_host, self.udp_port))
+                self.sock.sendto(payload, (self.udp_host, self.udp_port))
                 self.packets_sent += 1
+                if self.tx_monitor:
+                    self.tx_monitor.record_send(send_time)
             except BlockingIOError:
                 # Socket buffer is full, network is congested
                 self.packets_dropped += 1
+                if self.tx_monitor:
+                    self.tx_monitor.record_failed_send(send_time)
                 print("⚠️ Network congested - UDP buffer full, skipping packet")
             except OSError as e:
                 if e.errno == 11:  # EAGAIN/EWOULDBLOCK
                     self.packets_dropped += 1
+                    if self.tx_monitor:
+                        self.tx_monitor.record_failed_send(send_time)
                     print("⚠️ Network busy - packet dropped")
                 else:
                     raise  # Re-raise other network errors
             
+            # Record the frame as sent, including ones dropped by the network
+            if self.recorder:
+                self.record_frame(combined_data, payload)
+            
             # Print status (reduced frequency to avoid blocking)
-            motor_count = len(motor_positions)
-            finger_count = len(finger_data)
-            print(f"📡 Sent: {motor_count} motors, {finger_count} fingers at {time.strftime('%H:%M:%S')}")
+            if self.verbose:
+                motor_count = len(motor_positions)
+                glove_status = ", ".join(
+                    f"{side} {'ok' if glove.is_fresh() else 'stale'}"
+                    for side, glove in self.gloves.items()
+                )
+                print(f"📡 Sent: {motor_count} motors, gloves [{glove_status}] at {time.strftime('%H:%M:%S')}")
             
             # Print network statistics every 10 seconds
             current_time = time.time()
@@ -216,13 +412,15 @@ class CombinedGloveUDPSender:
                 if total_packets > 0:
                     success_rate = (self.packets_sent / total_packets) * 100
                     print(f"📊 Network stats: {self.packets_sent} sent, {self.packets_dropped} dropped ({success_rate:.1f}% success)")
+                if self.tx_monitor:
+                    self.tx_monitor.print_stats()
                 self.last_stats_time = current_time
             
             # Reset failure counter on success
             self.consecutive_failures = 0
             
         except asyncio.TimeoutError:
-            print(f"⚠️ Overall data gathering timeout after {max(KOS_TIMEOUT, GLOVE_TIMEOUT) + 0.1}s")
+            print(f"⚠️ Overall data gathering timeout after {KOS_TIMEOUT + 0.1}s")
             self.consecutive_failures += 1
         except Exception as e:
             print(f"❌ Error sending data: {e}")
@@ -233,6 +431,19 @@ class CombinedGloveUDPSender:
             print(f"⚠️ Too many consecutive failures ({self.consecutive_failures}), attempting reconnection...")
             await self.attempt_reconnection()
 
+    def record_frame(self, combined_data, payload):
+        """Record a frame, stopping the recording (but not sending) if it fails"""
+        try:
+            self.recorder.record(combined_data, payload)
+        except Exception as e:
+            # e.g. disk full - not a reason to reconnect KOS and the gloves
+            print(f"⚠️ Recording failed, no longer recording: {e}")
+            try:
+                self.recorder.close()
+            except Exception:
+                pass
+            self.recorder = None
+
     async def attempt_reconnection(self):
         """Attempt to reconnect to KOS and glove after failures"""
         print("🔄 Attempting to reconnect...")
@@ -252,17 +463,12 @@ class CombinedGloveUDPSender:
         except Exception as e:
             print(f"⚠️ Failed to reconnect to KOS: {e}")
             
-        # Try to reconnect to glove
+        # Try to reconnect to gloves
         try:
-            if self.pos_input:
-                # Close existing connection if any
-                try:
-                    await self.pos_input.stop()
-                except:
-                    pass
+            await self.stop_gloves()
             await self.setup_glove()
         except Exception as e:
-            print(f"⚠️ Failed to reconnect to glove: {e}")
+            print(f"⚠️ Failed to reconnect to gloves: {e}")
             
         print("🔄 Reconnection attempt completed")
 
@@ -283,6 +489,10 @@ class CombinedGloveUDPSender:
             print("❌ UDP setup failed")
             return
         
+        if self.record_path and not self.setup_recording():
+            print("❌ Recording setup failed")
+            return
+        
         print(f"✅ All systems ready! Sending data at {self.send_rate} Hz")
         print("   Press Ctrl+C to stop")
         
@@ -301,13 +511,25 @@ class CombinedGloveUDPSender:
         """Cleanup resources"""
         print("🧹 Cleaning up...")
         
-        if self.pos_input:
+        if self.gloves:
             try:
-                await self.pos_input.stop()
-                print("✅ Glove connection closed")
+                await self.stop_gloves()
+                print("✅ Glove connections closed")
             except:
                 pass
                 
+        if self.recorder:
+            try:
+                self.recorder.close()
+                print(f"✅ Recording saved to {self.record_path}")
+            except Exception as e:
+                print(f"⚠️ Failed to close recording: {e}")
+            self.recorder = None
+                
+        if self.tx_monitor:
+            await self.tx_monitor.stop()
+            self.tx_monitor = None
+                
         if self.sock:
             try:
                 self.sock.close()
@@ -343,10 +565,76 @@ async def test_single_send():
     await sender.cleanup()
     print("🧪 Test complete")
 
+# Benchmark mode function
+async def benchmark_glove_rates(duration=10.0):
+    """Compare the frame rate with one and two gloves on simulated backends
+
+    Returns True if the second glove does not lower the frame rate.
+    """
+    from simulated_backends import SIMULATED_GLOVES, simulated_kos_factory, simulated_glove_factory
+    
+    print(f"⏱️ Benchmark mode: {duration:.0f}s per run on simulated KOS and gloves...")
+    
+    rates = {}
+    for label, gloves in (("1 glove", {"left": SIMULATED_GLOVES["left"]}), ("2 gloves", SIMULATED_GLOVES)):
+        sender = CombinedGloveUDPSender(
+            udp_host="127.0.0.1",
+            gloves=gloves,
+            kos_factory=simulated_kos_factory,
+            glove_factory=simulated_glove_factory,
+        )
+        sender.verbose = False
+        
+        if not (await sender.setup_kos() and await sender.setup_glove() and sender.setup_udp()):
+            print(f"❌ Setup failed for {label} benchmark")
+            return False
+        
+        # Same loop as run(), with tick timing
+        tick_times = []
+        start_time = time.monotonic()
+        while time.monotonic() - start_time < duration and not sender.terminated:
+            tick_start = time.monotonic()
+            await sender.send_combined_data()
+            tick_times.append(time.monotonic() - tick_start)
+            await asyncio.sleep(sender.period)
+        elapsed = time.monotonic() - start_time
+        
+        await sender.cleanup()
+        
+        tick_times.sort()
+        rates[label] = sender.packets_sent / elapsed
+        print(f"📊 {label}: {rates[label]:.1f} Hz (target {sender.send_rate} Hz), "
+              f"tick median {tick_times[len(tick_times) // 2] * 1000:.2f}ms, "
+              f"p99 {tick_times[int(len(tick_times) * 0.99)] * 1000:.2f}ms")
+    
+    # Allow 2% for scheduling jitter between runs
+    if rates["2 gloves"] < rates["1 glove"] * 0.98:
+        print("❌ Frame rate dropped with the second glove")
+        return False
+    print("✅ Second glove does not lower the frame rate")
+    return True
+
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "test":
         # Test mode - send single packet
         asyncio.run(test_single_send())
+    elif len(sys.argv) > 1 and sys.argv[1] == "bench":
+        # Benchmark mode - simulated backends, no hardware needed
+        duration = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+        sys.exit(0 if asyncio.run(benchmark_glove_rates(duration)) else 1)
+    elif len(sys.argv) > 1 and sys.argv[1] == "record":
+        # Continuous mode, also recording frames to an indexed file
+        if len(sys.argv) < 3:
+            print("Usage: python3 combined_glove_udp_sender.py record <path.lrec>")
+            sys.exit(2)
+        sender = CombinedGloveUDPSender(record_path=sys.argv[2])
+        asyncio.run(sender.run())
+    elif len(sys.argv) > 1 and sys.argv[1] == "soak":
+        # Soak mode - long run on simulated backends with injected faults
+        from soak import run_soak, SOAK_DURATION, SOAK_SEND_RATE
+        duration = float(sys.argv[2]) if len(sys.argv) > 2 else SOAK_DURATION
+        send_rate = float(sys.argv[3]) if len(sys.argv) > 3 else SOAK_SEND_RATE
+        sys.exit(0 if asyncio.run(run_soak(duration, send_rate)) else 1)
     else:
         # Continuous mode
         sender = CombinedGloveUDPSender()
@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""Recording of leader UDP frames with a sparse time/sequence index.
+
+A recording is two files:
+- `<name>.lrec`: the frames exactly as sent over UDP, one JSON object per line,
+  written as they arrive and indexed in blocks of RECORD_BLOCK_FRAMES frames.
+- `<name>.lrec.idx`: one JSON line per block with its byte offset and length,
+  first sequence number, frame count, start/end timestamps and the min/max of
+  every joint and finger channel in the block.
+
+The index is small enough to load whole, so seeking to a time is a binary
+search over blocks, and range or threshold queries only decode the blocks
+whose summaries can match.
+
+Usage:
+    python3 leader_recording.py info session.lrec
+    python3 leader_recording.py seek session.lrec 14:02
+    python3 leader_recording.py find session.lrec joint:14 50 [below]
+    python3 leader_recording.py extract session.lrec 14:01:45 14:02:15 drop.lrec
+"""
+
+import bisect
+import datetime
+import json
+import os
+import sys
+
+RECORD_BLOCK_FRAMES = 256  # Frames per indexed block (~8s at 32 Hz)
+INDEX_SUFFIX = ".idx"
+
+
+def frame_channels(frame):
+    """Yield (channel, value) for every joint and finger value in a frame"""
+    for joint_id, position in frame.get("joints", {}).items():
+        yield f"joint:{joint_id}", position
+    # "fingers" is an alias of one side, so only fingers_<side> are summarized
+    for key, values in frame.items():
+        if key.startswith("fingers_") and isinstance(values, list):
+            for i, value in enumerate(values):
+                yield f"{key}:{i}", value
+
+
+def update_summary(mins, maxs, frame):
+    """Fold a frame into per-channel min/max dicts"""
+    for channel, value in frame_channels(frame):
+        if channel not in mins:
+            mins[channel] = maxs[channel] = value
+        elif value < mins[channel]:
+            mins[channel] = value
+        elif value > maxs[channel]:
+            maxs[channel] = value
+
+
+def summarize_frames(frames):
+    """Per-channel min/max over a list of frames"""
+    mins = {}
+    maxs = {}
+    for frame in frames:
+        update_summary(mins, maxs, frame)
+    return mins, maxs
+
+
+class LeaderRecorder:
+    """Appends frames to a recording, writing the index one block at a time
+
+    Each frame is written to the data file as it arrives, so only the current
+    block's summary is held in memory. Both files are fsynced when a block is
+    indexed. Frames after the last index entry (from a crash or power loss)
+    are indexed when the recording is reopened.
+    """
+
+    def __init__(self, path, block_frames=RECORD_BLOCK_FRAMES):
+        self.path = path
+        self.block_frames = block_frames
+
+        # Continue offsets and sequence numbers when appending to an existing recording
+        entries = self._recover_index()
+        self.offset = entries[-1]["offset"] + entries[-1]["length"] if entries else 0
+        self.next_seq = entries[-1]["first_seq"] + entries[-1]["count"] if entries else 0
+        self.last_timestamp = entries[-1]["t_end"] if entries else None
+        trailing = self._recover_trailing_frames(self.offset)
+
+        self.data_file = open(path, "ab")
+        self.index_file = open(path + INDEX_SUFFIX, "a")
+        self._reset_block()
+
+        # Index frames that were written but never made it into a block entry
+        self.recovered_frames = len(trailing)
+        for frame, length in trailing:
+            self._add_to_block(frame, length)
+        self.flush()
+
+    def _recover_index(self):
+        """Load existing index entries, dropping a partially written last entry"""
+        index_path = self.path + INDEX_SUFFIX
+        if not os.path.exists(index_path):
+            return []
+        with open(index_path, "rb") as f:
+            data = f.read()
+
+        entries = []
+        valid_length = 0
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                break
+            valid_length += len(line)
+
+        if valid_length < len(data):
+            os.truncate(index_path, valid_length)
+        return entries
+
+    def _recover_trailing_frames(self, indexed_end):
+        """(frame, length) for frames after indexed_end, dropping a partially written last line"""
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(indexed_end)
+            data = f.read()
+
+        frames = []
+        valid_length = 0
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                frames.append((json.loads(line), len(line)))
+            except ValueError:
+                break
+            valid_length += len(line)
+
+        if valid_length < len(data):
+            os.truncate(self.path, indexed_end + valid_length)
+        return frames
+
+    def _reset_block(self):
+        self.block_offset = self.offset
+        self.block_count = 0
+        self.block_start = None
+        self.block_end = None
+        self.block_ordered = True
+        self.block_min = {}
+        self.block_max = {}
+
+    def _add_to_block(self, frame, length):
+        """Account for a frame already in the data file, indexing the block when full"""
+        if self.block_start is None:
+            self.block_start = frame["timestamp"]
+        self.block_end = frame["timestamp"]
+        # time.time() can step backwards (e.g. NTP on a Pi without an RTC)
+        if self.last_timestamp is not None and frame["timestamp"] < self.last_timestamp:
+            self.block_ordered = False
+        self.last_timestamp = frame["timestamp"]
+        self.block_count += 1
+        self.offset += length
+        update_summary(self.block_min, self.block_max, frame)
+
+        if self.block_count >= self.block_frames:
+            self.flush()
+
+    def record(self, frame, payload):
+        """Add a frame, given as the dict and its encoded UDP payload"""
+        line = payload + b"\n"
+        self.data_file.write(line)
+        self.data_file.flush()
+        self._add_to_block(frame, len(line))
+
+    def flush(self):
+        """Write the index entry for the current block"""
+        if not self.block_count:
+            return
+
+        # Frames are already in the data file, so an entry never indexes missing
+        # data. Sync it first so the indexed blocks also survive a power loss.
+        os.fsync(self.data_file.fileno())
+        entry = {
+            "offset": self.block_offset,
+            "length": self.offset - self.block_offset,
+            "first_seq": self.next_seq,
+            "count": self.block_count,
+            "t_start": self.block_start,
+            "t_end": self.block_end,
+            "ordered": self.block_ordered,
+            "min": self.block_min,
+            "max": self.block_max,
+        }
+        self.index_file.write(json.dumps(entry) + "\n")
+        self.index_file.flush()
+        os.fsync(self.index_file.fileno())
+
+        self.next_seq += self.block_count
+        self._reset_block()
+
+    def close(self):
+        self.flush()
+        self.data_file.close()
+        self.index_file.close()
+
+
+class LeaderRecording:
+    """Read access to a recording through its block index
+
+    Seeks binary-search the block start times, which needs timestamps that
+    never go backwards. If the wall clock stepped back during the session the
+    recording is flagged as unordered and every lookup scans the blocks in
+    order instead.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # A recording cut off mid-write can end in a partial index line - skip it
+        with open(path + INDEX_SUFFIX) as f:
+            self.blocks = [json.loads(line) for line in f if line.endswith("\n") and line.strip()]
+        self.block_starts = [block["t_start"] for block in self.blocks]
+
+        # Blocks with "ordered": false had a frame earlier than the one before it
+        self.ordered = all(block.get("ordered", True) for block in self.blocks) and all(
+            previous["t_end"] <= block["t_start"] for previous, block in zip(self.blocks, self.blocks[1:])
+        )
+        if not self.ordered:
+            print(f"⚠️ {path}: timestamps go backwards (clock step?) - using a linear scan")
+
+    @property
+    def t_start(self):
+        return min(self.block_starts) if self.blocks else None
+
+    @property
+    def t_end(self):
+        return max(block["t_end"] for block in self.blocks) if self.blocks else None
+
+    @property
+    def frame_count(self):
+        return sum(block["count"] for block in self.blocks)
+
+    def _read_block_lines(self, block):
+        with open(self.path, "rb") as f:
+            f.seek(block["offset"])
+            return f.read(block["length"]).splitlines()
+
+    def _read_block(self, block):
+        """Yield (seq, frame) for every frame in a block"""
+        for i, line in enumerate(self._read_block_lines(block)):
+            yield block["first_seq"] + i, json.loads(line)
+
+    def _block_index_at(self, timestamp):
+        """Index of the block containing timestamp (or the first block after it)"""
+        if not self.ordered:
+            return 0
+        i = bisect.bisect_right(self.block_starts, timestamp) - 1
+        if i >= 0 and self.blocks[i]["t_end"] < timestamp:
+            i += 1
+        return max(i, 0)
+
+    def _past_end(self, block, end):
+        """True if this and every later block start after end (ordered recordings only)"""
+        return self.ordered and end is not None and block["t_start"] > end
+
+    @staticmethod
+    def _may_overlap(block, start, end):
+        """False if the block's frames are known to be outside [start, end]"""
+        if not block.get("ordered", True):
+            return True
+        return not ((start is not None and block["t_end"] < start) or
+                    (end is not None and block["t_start"] > end))
+
+    def seek(self, timestamp):
+        """Return (seq, frame) of the first frame at or after timestamp, or None
+
+        In an unordered recording this is the first such frame in recording order.
+        """
+        for block in self.blocks[self._block_index_at(timestamp):]:
+            if not self._may_overlap(block, timestamp, None):
+                continue
+            for seq, frame in self._read_block(block):
+                if frame["timestamp"] >= timestamp:
+                    return seq, frame
+        return None
+
+    def frames(self, start=None, end=None):
+        """Yield (seq, frame) for frames with start <= timestamp <= end"""
+        first = self._block_index_at(start) if start is not None else 0
+        for block in self.blocks[first:]:
+            if self._past_end(block, end):
+                break
+            if not self._may_overlap(block, start, end):
+                continue
+            for seq, frame in self._read_block(block):
+                if start is not None and frame["timestamp"] < start:
+                    continue
+                if end is not None and frame["timestamp"] > end:
+                    if self.ordered:
+                        break
+                    continue
+                yield seq, frame
+
+    def find(self, channel, above=None, below=None):
+        """Yield (seq, timestamp, value) where channel > above and/or < below
+
+        Channels are named like "joint:14" or "fingers_left:0". Only blocks
+        whose min/max summary can contain a match are decoded.
+        """
+        for block in self.blocks:
+            if channel not in block["max"]:
+                continue
+            if above is not None and block["max"][channel] <= above:
+                continue
+            if below is not None and block["min"][channel] >= below:
+                continue
+            for seq, frame in self._read_block(block):
+                for frame_channel, value in frame_channels(frame):
+                    if frame_channel != channel:
+                        continue
+                    if (above is None or value > above) and (below is None or value < below):
+                        yield seq, frame["timestamp"], value
+
+    def extract(self, start, end, out_path):
+        """Copy frames with start <= timestamp <= end to a new recording
+
+        Blocks entirely inside the range are copied byte for byte with their
+        index entries; only blocks that straddle the range are decoded.
+        """
+        # Opening the output with "wb" would truncate the recording being read
+        source_files = [self.path, self.path + INDEX_SUFFIX]
+        for out_file in (out_path, out_path + INDEX_SUFFIX):
+            for source_file in source_files:
+                if os.path.abspath(out_file) == os.path.abspath(source_file) or (
+                        os.path.exists(out_file) and os.path.samefile(out_file, source_file)):
+                    raise ValueError(f"Cannot extract {self.path} onto itself ({out_file})")
+
+        count = 0
+        offset = 0
+        with open(self.path, "rb") as src, open(out_path, "wb") as data_file, \
+                open(out_path + INDEX_SUFFIX, "w") as index_file:
+            for block in self.blocks[self._block_index_at(start):]:
+                if self._past_end(block, end):
+                    break
+                if not self._may_overlap(block, start, end):
+                    continue
+
+                if block.get("ordered", True) and block["t_start"] >= start and block["t_end"] <= end:
+                    src.seek(block["offset"])
+                    data = src.read(block["length"])
+                    chunks = [(data, dict(block))]
+                else:
+                    chunks = self._extract_runs(block, start, end)
+
+                for data, entry in chunks:
+                    entry["offset"] = offset
+                    data_file.write(data)
+                    index_file.write(json.dumps(entry) + "\n")
+                    offset += len(data)
+                    count += entry["count"]
+        return count
+
+    def _extract_runs(self, block, start, end):
+        """(data, entry) for each run of consecutive frames in range within a block
+
+        Keeping runs consecutive keeps sequence numbers implied by first_seq correct.
+        """
+        runs = []
+        lines = []
+        frames = []
+        first_seq = None
+        for i, line in enumerate(self._read_block_lines(block) + [None]):
+            frame = json.loads(line) if line is not None else None
+            if frame is not None and start <= frame["timestamp"] <= end:
+                if first_seq is None:
+                    first_seq = block["first_seq"] + i
+                lines.append(line + b"\n")
+                frames.append(frame)
+                continue
+            if not frames:
+                continue
+
+            # Re-summarize the run
+            data = b"".join(lines)
+            mins, maxs = summarize_frames(frames)
+            timestamps = [run_frame["timestamp"] for run_frame in frames]
+            runs.append((data, {
+                "offset": 0,
+                "length": len(data),
+                "first_seq": first_seq,
+                "count": len(frames),
+                "t_start": timestamps[0],
+                "t_end": timestamps[-1],
+                "ordered": timestamps == sorted(timestamps),
+                "min": mins,
+                "max": maxs,
+            }))
+            lines = []
+            frames = []
+            first_seq = None
+        return runs
+
+
+def parse_time(value, recording):
+    """Parse epoch seconds or a local HH:MM[:SS] time on the recording's start date"""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    clock = datetime.time.fromisoformat(value)
+    start = datetime.datetime.fromtimestamp(recording.t_start)
+    timestamp = datetime.datetime.combine(start.date(), clock).timestamp()
+    # Sessions running past midnight
+    if timestamp < recording.t_start - 12 * 3600:
+        timestamp += 24 * 3600
+    return timestamp
+
+
+def format_time(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    command, path = sys.argv[1], sys.argv[2]
+    recording = LeaderRecording(path)
+    if not recording.blocks:
+        print(f"❌ {path} has no indexed frames")
+        sys.exit(1)
+
+    if command == "info":
+        print(f"📼 {path}: {recording.frame_count} frames in {len(recording.blocks)} blocks")
+        print(f"   {format_time(recording.t_start)} -> {format_time(recording.t_end)} "
+              f"({recording.t_end - recording.t_start:.1f}s)")
+        print(f"   Channels: {', '.join(sorted(recording.blocks[0]['max']))}")
+    elif command == "seek":
+        result = recording.seek(parse_time(sys.argv[3], recording))
+        if result is None:
+            print("❌ No frames at or after that time")
+        else:
+            seq, frame = result
+            print(f"📍 seq {seq} at {format_time(frame['timestamp'])}")
+            print(json.dumps(frame, indent=2))
+    elif command == "find":
+        channel, threshold = sys.argv[3], float(sys.argv[4])
+        below = len(sys.argv) > 5 and sys.argv[5] == "below"
+        matches = recording.find(channel, below=threshold) if below else recording.find(channel, above=threshold)
+        for seq, timestamp, value in matches:
+            print(f"seq {seq} at {format_time(timestamp)}: {channel} = {value}")
+    elif command == "extract":
+        start = parse_time(sys.argv[3], recording)
+        end = parse_time(sys.argv[4], recording)
+        try:
+            count = recording.extract(start, end, sys.argv[5])
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"✅ Extracted {count} frames to {sys.argv[5]}")
+    else:
+        print(__doc__)
+        sys.exit(1)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Simulated KOS and glove backends for running the sender without hardware."""
+
+import asyncio
+import math
+import random
+import time
+from types import SimpleNamespace
+
+# Actuator IDs on the bimanual leader arms
+ACTUATOR_IDS = [11, 12, 13, 14, 15, 21, 22, 23, 24, 25]
+
+# Number of finger sensors reported by the glove
+NUM_FINGERS = 6
+
+# Maximum finger sensor value
+FINGER_MAX_VALUE = 65535
+
+# Bimanual glove configuration for CombinedGloveUDPSender
+SIMULATED_GLOVES = {
+    "left": {"type": "usb", "serial": "SIM-LEFT"},
+    "right": {"type": "usb", "serial": "SIM-RIGHT"},
+}
+
+# How long an injected timeout hangs - longer than any sender timeout
+FAULT_HANG_TIME = 2.0
+
+
+async def inject_fault(name, timeout_rate, error_rate):
+    """Randomly hang or raise, with the given probabilities per call"""
+    r = random.random()
+    if r < timeout_rate:
+        await asyncio.sleep(FAULT_HANG_TIME)
+    elif r < timeout_rate + error_rate:
+        raise ConnectionError(f"Simulated {name} failure")
+
+
+class SimulatedActuatorService:
+    """Stand-in for KOS.actuator that returns slowly moving joint positions"""
+
+    def __init__(self, latency, timeout_rate, error_rate):
+        self.latency = latency
+        self.timeout_rate = timeout_rate
+        self.error_rate = error_rate
+        self.start_time = time.monotonic()
+
+    async def get_actuators_state(self):
+        await asyncio.sleep(self.latency)
+        await inject_fault("KOS", self.timeout_rate, self.error_rate)
+        t = time.monotonic() - self.start_time
+        states = []
+        for i, actuator_id in enumerate(ACTUATOR_IDS):
+            position = 45.0 * math.sin(0.5 * t + i)
+            velocity = 22.5 * math.cos(0.5 * t + i)
+            states.append(SimpleNamespace(actuator_id=actuator_id, position=position, velocity=velocity))
+        return SimpleNamespace(states=states)
+
+
+class SimulatedKOS:
+    """Drop-in replacement for pykos.KOS"""
+
+    def __init__(self, ip="127.0.0.1", latency=0.002, timeout_rate=0.0, error_rate=0.0):
+        self.ip = ip
+        self.actuator = SimulatedActuatorService(latency, timeout_rate, error_rate)
+
+    async def close(self):
+        pass
+
+
+class SimulatedGlove:
+    """Drop-in replacement for PosInputUsbGlove / PosInputBleGlove"""
+
+    def __init__(self, serial=None, latency=0.01, timeout_rate=0.0, error_rate=0.0):
+        self.serial = serial
+        self.latency = latency
+        self.timeout_rate = timeout_rate
+        self.error_rate = error_rate
+        self.phase = random.random() * 2 * math.pi
+        self.running = False
+
+    async def start(self):
+        self.running = True
+        return True
+
+    async def get_position(self):
+        await asyncio.sleep(self.latency)
+        await inject_fault("glove", self.timeout_rate, self.error_rate)
+        t = time.monotonic()
+        return [
+            round(FINGER_MAX_VALUE * (0.5 + 0.5 * math.sin(t + self.phase + i)))
+            for i in range(NUM_FINGERS)
+        ]
+
+    async def stop(self):
+        self.running = False
+
+
+def simulated_kos_factory(ip):
+    """KOS factory for CombinedGloveUDPSender"""
+    return SimulatedKOS(ip)
+
+
+def simulated_glove_factory(kind, serial):
+    """Glove factory for CombinedGloveUDPSender"""
+    return SimulatedGlove(serial)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Long-running soak test of the combined sender on simulated backends.
+
+Runs the full acquisition -> transform -> encode -> send path against simulated
+KOS and gloves with injected timeouts, errors and periodic reconnects. RSS and
+tracemalloc are sampled every SAMPLE_INTERVAL and compared against the first
+sample, along with tick latency; the test fails if any exceeds its threshold.
+"""
+
+import asyncio
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+from combined_glove_udp_sender import CombinedGloveUDPSender
+from simulated_backends import SIMULATED_GLOVES, SimulatedKOS, SimulatedGlove
+
+# Soak configuration
+SOAK_DURATION = 3600.0  # Seconds
+SOAK_SEND_RATE = 100.0  # Hz - well above the normal SEND_RATE
+SAMPLE_INTERVAL = 30.0  # Seconds between memory / latency samples
+RECONNECT_INTERVAL = 120.0  # Seconds between forced reconnects
+
+# Injected faults (probability per KOS / glove read)
+FAULT_TIMEOUT_RATE = 0.001
+FAULT_ERROR_RATE = 0.002
+
+# Failure thresholds, relative to the first sample
+MAX_RSS_GROWTH_MB = 10.0
+MAX_TRACEMALLOC_GROWTH_MB = 2.0
+MAX_TICK_LATENCY_RATIO = 1.5  # Median / p99 tick latency vs first sample
+TICK_LATENCY_SLACK = 0.002  # Seconds - ignore degradation below this
+
+
+def get_rss_mb():
+    """Current resident set size in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        # Not Linux - fall back to peak RSS (KB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def tick_latency_degraded(baseline, current):
+    return current > max(baseline * MAX_TICK_LATENCY_RATIO, baseline + TICK_LATENCY_SLACK)
+
+
+async def run_soak(duration=SOAK_DURATION, send_rate=SOAK_SEND_RATE, sample_interval=SAMPLE_INTERVAL):
+    """Run the soak test, returns True if all thresholds held"""
+    sender = CombinedGloveUDPSender(
+        udp_host="127.0.0.1",
+        send_rate=send_rate,
+        gloves=SIMULATED_GLOVES,  # Both reader tasks, including their reconnects
+        kos_factory=lambda ip: SimulatedKOS(
+            ip, timeout_rate=FAULT_TIMEOUT_RATE, error_rate=FAULT_ERROR_RATE),
+        glove_factory=lambda kind, serial: SimulatedGlove(
+            serial, timeout_rate=FAULT_TIMEOUT_RATE, error_rate=FAULT_ERROR_RATE),
+    )
+    sender.verbose = False
+
+    print(f"🧪 Soak mode: {duration:.0f}s at {send_rate} Hz on simulated KOS and gloves...")
+
+    if not (await sender.setup_kos() and await sender.setup_glove() and sender.setup_udp()):
+        print("❌ Setup failed for soak test")
+        return False
+
+    tracemalloc.start()
+
+    baseline = None
+    baseline_snapshot = None
+    samples = 0
+    failures = []
+    reconnects = 0
+    tick_times = []
+
+    start_time = time.monotonic()
+    next_sample = start_time + sample_interval
+    next_reconnect = start_time + RECONNECT_INTERVAL
+
+    try:
+        while time.monotonic() - start_time < duration and not sender.terminated and not failures:
+            # Same loop as run(), with tick timing
+            tick_start = time.monotonic()
+            await sender.send_combined_data()
+            tick_times.append(time.monotonic() - tick_start)
+            await asyncio.sleep(sender.period)
+
+            now = time.monotonic()
+            if now >= next_reconnect:
+                await sender.attempt_reconnection()
+                reconnects += 1
+                next_reconnect = now + RECONNECT_INTERVAL
+
+            if now < next_sample:
+                continue
+            next_sample = now + sample_interval
+            samples += 1
+
+            tick_times.sort()
+            snapshot = tracemalloc.take_snapshot()
+            sample = {
+                "rss": get_rss_mb(),
+                "traced": tracemalloc.get_traced_memory()[0] / (1024 * 1024),
+                "tick_median": percentile(tick_times, 0.5),
+                "tick_p99": percentile(tick_times, 0.99),
+            }
+            tick_times = []
+
+            print(f"🧪 [{now - start_time:7.0f}s] RSS {sample['rss']:.1f}MB, "
+                  f"traced {sample['traced']:.2f}MB, "
+                  f"tick median {sample['tick_median'] * 1000:.2f}ms p99 {sample['tick_p99'] * 1000:.2f}ms, "
+                  f"{sender.packets_sent} sent, {sender.packets_dropped} dropped, {reconnects} reconnects")
+
+            if baseline is None:
+                # First sample is the baseline, after imports and buffers have warmed up
+                baseline = sample
+                baseline_snapshot = snapshot
+                continue
+
+            if sample["rss"] - baseline["rss"] > MAX_RSS_GROWTH_MB:
+                failures.append(f"RSS grew {sample['rss'] - baseline['rss']:.1f}MB (limit {MAX_RSS_GROWTH_MB}MB)")
+            if sample["traced"] - baseline["traced"] > MAX_TRACEMALLOC_GROWTH_MB:
+                failures.append(f"Traced memory grew {sample['traced'] - baseline['traced']:.2f}MB "
+                                f"(limit {MAX_TRACEMALLOC_GROWTH_MB}MB)")
+            for key in ("tick_median", "tick_p99"):
+                if tick_latency_degraded(baseline[key], sample[key]):
+                    failures.append(f"{key} degraded {baseline[key] * 1000:.2f}ms -> {sample[key] * 1000:.2f}ms")
+
+            if failures:
+                print("🔍 Top allocation growth since baseline:")
+                for stat in snapshot.compare_to(baseline_snapshot, "lineno")[:10]:
+                    print(f"   {stat}")
+
+    finally:
+        tracemalloc.stop()
+        await sender.cleanup()
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return False
+    # Nothing was compared against the baseline, so there is nothing to pass
+    if samples < 2:
+        if sender.terminated:
+            print("⚠️ Soak test aborted before two samples were compared")
+        else:
+            print(f"⚠️ Soak test too short to compare samples - run for more than {sample_interval * 2:.0f}s")
+        return False
+
+    print(f"✅ Soak test passed: {sender.packets_sent} sent, {reconnects} reconnects")
+    return True
+
@@ -0,0 +1,116 @@
+import json
+
+import pytest
+
+from leader_recording import INDEX_SUFFIX, LeaderRecorder, LeaderRecording
+
+T0 = 1_792_000_000.0
+
+
+def make_frame(timestamp, value):
+    return {"timestamp": timestamp, "joints": {"14": value}, "fingers_left": [value] * 6}
+
+
+def record(path, timestamps, block_frames=50):
+    recorder = LeaderRecorder(str(path), block_frames=block_frames)
+    for i, timestamp in enumerate(timestamps):
+        frame = make_frame(timestamp, i)
+        recorder.record(frame, json.dumps(frame).encode())
+    return recorder
+
+
+def in_range(timestamps, start, end):
+    return [i for i, timestamp in enumerate(timestamps) if start <= timestamp <= end]
+
+
+@pytest.fixture
+def timestamps():
+    return [T0 + i * 0.125 for i in range(500)]
+
+
+def test_seek_frames_and_find(tmp_path, timestamps):
+    record(tmp_path / "s.lrec", timestamps).close()
+    recording = LeaderRecording(str(tmp_path / "s.lrec"))
+
+    assert recording.ordered
+    assert recording.frame_count == 500
+    assert len(recording.blocks) == 10
+
+    seq, frame = recording.seek(T0 + 10.0)
+    assert seq == 80 and frame["timestamp"] == T0 + 10.0
+    assert recording.seek(T0 + 10.01)[0] == 81
+    assert recording.seek(T0 + 1000) is None
+
+    seqs = [seq for seq, _ in recording.frames(T0 + 5, T0 + 12)]
+    assert seqs == in_range(timestamps, T0 + 5, T0 + 12)
+
+    matches = [seq for seq, _, _ in recording.find("joint:14", above=480)]
+    assert matches == list(range(481, 500))
+    assert [seq for seq, _, _ in recording.find("fingers_left:0", below=3)] == [0, 1, 2]
+
+
+def test_extract(tmp_path, timestamps):
+    record(tmp_path / "s.lrec", timestamps).close()
+    recording = LeaderRecording(str(tmp_path / "s.lrec"))
+
+    count = recording.extract(T0 + 5, T0 + 20, str(tmp_path / "out.lrec"))
+    expected = in_range(timestamps, T0 + 5, T0 + 20)
+    assert count == len(expected)
+
+    extracted = LeaderRecording(str(tmp_path / "out.lrec"))
+    assert [seq for seq, _ in extracted.frames()] == expected
+    assert extracted.seek(T0 + 10.0)[0] == 80
+
+    with pytest.raises(ValueError):
+        recording.extract(T0, T0 + 1, str(tmp_path / "s.lrec"))
+    assert LeaderRecording(str(tmp_path / "s.lrec")).frame_count == 500
+
+
+def test_recovers_unindexed_and_torn_tail(tmp_path, timestamps):
+    path = tmp_path / "s.lrec"
+    # Crash after 120 frames: the last 20 were written but never indexed
+    recorder = record(path, timestamps[:120])
+    recorder.data_file.close()
+    recorder.index_file.close()
+    with open(path, "ab") as f:
+        f.write(b'{"timestamp": 17')
+    with open(str(path) + INDEX_SUFFIX, "a") as f:
+        f.write('{"offset": 1')
+
+    # The reader skips the torn index line
+    assert LeaderRecording(str(path)).frame_count == 100
+
+    recorder = LeaderRecorder(str(path), block_frames=50)
+    assert recorder.recovered_frames == 20
+    for i, timestamp in enumerate(timestamps[120:200], start=120):
+        frame = make_frame(timestamp, i)
+        recorder.record(frame, json.dumps(frame).encode())
+    recorder.close()
+
+    recording = LeaderRecording(str(path))
+    frames = list(recording.frames())
+    assert [seq for seq, _ in frames] == list(range(200))
+    assert [frame["timestamp"] for _, frame in frames] == timestamps[:200]
+
+
+def test_clock_step_falls_back_to_linear_scan(tmp_path, timestamps):
+    # Wall clock steps back 30s in the middle of a block
+    stepped = timestamps[:310] + [timestamp - 30 for timestamp in timestamps[310:]]
+    record(tmp_path / "s.lrec", stepped).close()
+    recording = LeaderRecording(str(tmp_path / "s.lrec"))
+
+    assert not recording.ordered
+
+    start, end = T0 + 5, T0 + 12
+    expected = in_range(stepped, start, end)
+    assert [seq for seq, _ in recording.frames(start, end)] == expected
+    assert recording.seek(start)[0] == expected[0]
+
+    # Kept frames are split into runs of consecutive sequence numbers
+    count = recording.extract(start, end, str(tmp_path / "out.lrec"))
+    assert count == len(expected)
+    extracted = LeaderRecording(str(tmp_path / "out.lrec"))
+    assert [seq for seq, _ in extracted.frames()] == expected
+    for block in extracted.blocks:
+        seqs = [seq for seq, _ in extracted._read_block(block)]
+        assert seqs == [seq for seq in expected if block["first_seq"] <= seq < block["first_seq"] + block["count"]]
@@ -0,0 +1,36 @@
+import socket
+
+import pytest
+
+from tx_timestamping import TxTimestampMonitor
+
+
+def make_monitor(sends):
+    """Monitor with sends recorded 1s apart, True for accepted and False for EAGAIN"""
+    monitor = TxTimestampMonitor(socket.socket(socket.AF_INET, socket.SOCK_DGRAM))
+    for i, accepted in enumerate(sends):
+        if accepted:
+            monitor.record_send(float(i))
+        else:
+            monitor.record_failed_send(float(i))
+    return monitor
+
+
+def test_failed_sends_not_counted_by_kernel():
+    # ok, fail, fail, ok, ok -> kernel only numbers the accepted datagrams 0, 1, 2
+    monitor = make_monitor([True, False, False, True, True])
+    for ts_id, send_index in [(0, 0), (1, 3), (2, 4)]:
+        monitor._match(ts_id, send_index + 0.001)
+    assert monitor.delays == pytest.approx([0.001, 0.001, 0.001])
+    assert monitor.unmatched == 0
+    monitor.sock.close()
+
+
+def test_failed_sends_counted_by_kernel():
+    # Kernel consumes an ID for each failed send, so accepted sends keep IDs 0, 3, 4
+    monitor = make_monitor([True, False, False, True, True])
+    for ts_id in [0, 3, 4]:
+        monitor._match(ts_id, ts_id + 0.001)
+    assert monitor.delays == pytest.approx([0.001, 0.001, 0.001])
+    assert monitor.unmatched == 0
+    monitor.sock.close()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Kernel TX timestamps and send queue depth for the UDP sender socket (Linux only).
+
+With SO_TIMESTAMPING the kernel reports when each datagram left the network
+stack for the driver. Comparing that to the time sendto() was called shows how
+long frames sit in the socket/qdisc, separately from any delay on the Python
+side. SIOCOUTQ gives the bytes still queued on the socket at each sample.
+"""
+
+import asyncio
+import collections
+import fcntl
+import socket
+import struct
+import termios
+import time
+
+# Linux constants that the socket module does not always export
+SO_TIMESTAMPING = getattr(socket, "SO_TIMESTAMPING", 37)
+SOF_TIMESTAMPING_TX_SOFTWARE = 1 << 1
+SOF_TIMESTAMPING_SOFTWARE = 1 << 4
+SOF_TIMESTAMPING_OPT_ID = 1 << 7
+SOF_TIMESTAMPING_OPT_TSONLY = 1 << 11
+MSG_ERRQUEUE = getattr(socket, "MSG_ERRQUEUE", 0x2000)
+IP_RECVERR = getattr(socket, "IP_RECVERR", 11)
+SIOCOUTQ = termios.TIOCOUTQ  # Same ioctl number on Linux
+
+# struct scm_timestamping { struct timespec ts[3]; } - ts[0] is the software timestamp.
+# SO_TIMESTAMPING (37) is SO_TIMESTAMPING_OLD, whose timespec fields are native longs
+# (4 bytes each on 32-bit Raspberry Pi OS, 8 on 64-bit)
+SCM_TIMESTAMPING_FORMAT = "ll"
+# struct sock_extended_err - ee_data carries the SOF_TIMESTAMPING_OPT_ID counter
+SOCK_EXTENDED_ERR_FORMAT = "IBBBBII"
+
+SAMPLE_INTERVAL = 0.05  # Seconds between error queue drains / queue depth samples
+PENDING_TIMEOUT = 1.0  # Seconds to wait for a send's timestamp before giving up on it
+HISTORY_LENGTH = 12000  # Queue depth samples kept (10 minutes at SAMPLE_INTERVAL)
+
+
+class TxTimestampMonitor:
+    """Collects kernel TX timestamps and SIOCOUTQ samples for one UDP socket"""
+
+    def __init__(self, sock, sample_interval=SAMPLE_INTERVAL):
+        self.sock = sock
+        self.sample_interval = sample_interval
+        self.task = None
+
+        # (send time, accepted) by timestamp ID, in send order. Failed sends are
+        # kept as well so we can tell whether the kernel counted them.
+        self.pending = collections.OrderedDict()
+        self.next_id = 0
+        self.id_shift = 0
+
+        # Send -> transmit delays (seconds) since the last report
+        self.delays = []
+        self.unmatched = 0
+        self.timed_out = 0
+
+        # (time.time, bytes queued) samples of SIOCOUTQ
+        self.queue_depth = collections.deque(maxlen=HISTORY_LENGTH)
+        self.last_report_time = time.time()
+
+    def enable(self):
+        """Enable software TX timestamps on the socket"""
+        try:
+            flags = (SOF_TIMESTAMPING_TX_SOFTWARE | SOF_TIMESTAMPING_SOFTWARE |
+                     SOF_TIMESTAMPING_OPT_ID | SOF_TIMESTAMPING_OPT_TSONLY)
+            self.sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPING, flags)
+            return True
+        except OSError as e:
+            print(f"⚠️ TX timestamping not supported: {e}")
+            return False
+
+    def start(self):
+        """Start draining the error queue in the background"""
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def record_send(self, send_time):
+        """Record a datagram accepted by sendto(), called with the time taken just before it"""
+        self.pending[self.next_id] = (send_time, True)
+        self.next_id += 1
+
+    def record_failed_send(self, send_time):
+        """Record a sendto() that failed (e.g. EAGAIN)"""
+        self.pending[self.next_id] = (send_time, False)
+        self.next_id += 1
+
+    async def _run(self):
+        while True:
+            self.drain()
+            self.sample_queue_depth()
+            await asyncio.sleep(self.sample_interval)
+
+    def drain(self):
+        """Read all timestamps currently on the socket error queue"""
+        while True:
+            try:
+                _, ancdata, _, _ = self.sock.recvmsg(0, 512, MSG_ERRQUEUE)
+            except OSError:
+                # BlockingIOError once the error queue is empty
+                break
+
+            tx_time = None
+            ts_id = None
+            for level, cmsg_type, data in ancdata:
+                if level == socket.SOL_SOCKET and cmsg_type == SO_TIMESTAMPING:
+                    sec, nsec = struct.unpack_from(SCM_TIMESTAMPING_FORMAT, data)
+                    tx_time = sec + nsec * 1e-9
+                elif level == socket.IPPROTO_IP and cmsg_type == IP_RECVERR:
+                    ts_id = struct.unpack_from(SOCK_EXTENDED_ERR_FORMAT, data)[6]
+
+            if tx_time is not None and ts_id is not None:
+                self._match(ts_id, tx_time)
+
+        self._expire_pending()
+
+    def _match(self, ts_id, tx_time):
+        key = ts_id + self.id_shift
+        entry = self.pending.get(key)
+        while entry is not None and not entry[1]:
+            # The kernel did not count the failed send(s), so its IDs are behind ours
+            del self.pending[key]
+            self.id_shift += 1
+            key += 1
+            entry = self.pending.get(key)
+
+        entry = self.pending.pop(key, None)
+        if entry is None or not entry[1]:
+            self.unmatched += 1
+            return
+        self.delays.append(tx_time - entry[0])
+
+    def _expire_pending(self):
+        cutoff = time.time() - PENDING_TIMEOUT
+        while self.pending:
+            key, (send_time, accepted) = next(iter(self.pending.items()))
+            if send_time > cutoff:
+                break
+            del self.pending[key]
+            if accepted:
+                self.timed_out += 1
+
+    def sample_queue_depth(self):
+        """Sample the bytes not yet sent from the socket (SIOCOUTQ)"""
+        try:
+            buf = fcntl.ioctl(self.sock.fileno(), SIOCOUTQ, struct.pack("i", 0))
+            self.queue_depth.append((time.time(), struct.unpack("i", buf)[0]))
+        except OSError:
+            pass
+
+    def stats(self):
+        """Delay and queue depth statistics since the last call"""
+        delays = sorted(self.delays)
+        depths = [depth for sample_time, depth in self.queue_depth if sample_time > self.last_report_time]
+        stats = {
+            "timestamps": len(delays),
+            "unmatched": self.unmatched,
+            "timed_out": self.timed_out,
+            "delay_median": delays[len(delays) // 2] if delays else None,
+            "delay_p99": delays[int(len(delays) * 0.99)] if delays else None,
+            "delay_max": delays[-1] if delays else None,
+            "queue_depth_last": depths[-1] if depths else None,
+            "queue_depth_p95": sorted(depths)[int(len(depths) * 0.95)] if depths else None,
+            "queue_depth_max": max(depths) if depths else None,
+        }
+
+        self.delays = []
+        self.unmatched = 0
+        self.timed_out = 0
+        self.last_report_time = time.time()
+        return stats
+
+    def history(self):
+        """All kept (time.time, bytes queued) SIOCOUTQ samples, oldest first"""
+        return list(self.queue_depth)
+
+    def print_stats(self):
+        stats = self.stats()
+        if stats["timestamps"]:
+            delay = (f"send->wire median {stats['delay_median'] * 1e6:.0f}us, "
+                     f"p99 {stats['delay_p99'] * 1e6:.0f}us, max {stats['delay_max'] * 1e6:.0f}us")
+        else:
+            delay = "no timestamps"
+        if stats["queue_depth_last"] is not None:
+            depth = (f"SIOCOUTQ last {stats['queue_depth_last']}B, "
+                     f"p95 {stats['queue_depth_p95']}B, max {stats['queue_depth_max']}B")
+        else:
+            depth = "no SIOCOUTQ samples"
+        # Unmatched timestamps mean the send IDs are out of step and delays may be wrong
+        print(f"📊 TX stats: {delay} ({stats['timestamps']} timestamps, {stats['unmatched']} unmatched, "
+              f"{stats['timed_out']} timed out), {depth}")
+        if stats["unmatched"]:
+            print(f"⚠️ {stats['unmatched']} TX timestamps did not match a send - delays may be misattributed")